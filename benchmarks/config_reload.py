@@ -0,0 +1,80 @@
+"""Benchmark for decrypting secrets on a configuration reload.
+
+Run from the repository root:
+
+    python -m benchmarks.config_reload
+"""
+import copy
+import time
+from cryptography.fernet import Fernet
+from libprobe.config import encrypt, decrypt
+from libprobe.secret_cache import SecretCache
+
+
+N_ASSETS = 10_000
+N_RELOADS = 3
+
+
+class CountingFernet(Fernet):
+
+    decrypts = 0
+
+    def decrypt(self, token, ttl=None):
+        self.decrypts += 1
+        return super().decrypt(token, ttl)
+
+
+def make_config(n: int, with_secret: bool) -> dict:
+    def asset_config(asset_id):
+        config = {'username': 'bob', 'password': f'pw{asset_id}'}
+        if with_secret:
+            config['secret'] = f'secret{asset_id}'
+        return config
+
+    return {
+        'exampleProbe': {
+            'config': {'username': 'alice', 'password': 'secret'},
+            'assets': [{
+                'id': asset_id,
+                'config': asset_config(asset_id),
+            } for asset_id in range(n)]
+        }
+    }
+
+
+def reload(config: dict, fernet) -> float:
+    # the config is copied as a reload reads a fresh config from file
+    config = copy.deepcopy(config)
+    start = time.perf_counter()
+    encrypt(config, fernet)
+    decrypt(config, fernet)
+    if isinstance(fernet, SecretCache):
+        fernet.sweep()
+    return time.perf_counter() - start
+
+
+def bench(with_secret: bool):
+    fernet = CountingFernet(Fernet.generate_key())
+    config = make_config(N_ASSETS, with_secret)
+
+    # encrypt once, the reloads below start with an encrypted config
+    encrypt(config, fernet)
+
+    secrets = 'password and secret' if with_secret else 'password'
+    print(f'{N_ASSETS} assets with {secrets}:')
+
+    fernet.decrypts = 0
+    t = reload(config, fernet)
+    print(f'  without cache: {t:.3f}s ({fernet.decrypts} decrypts)')
+
+    cache = SecretCache(fernet)
+    for i in range(N_RELOADS):
+        fernet.decrypts = 0
+        t = reload(config, cache)
+        print(f'  with cache, reload {i}: {t:.3f}s '
+              f'({fernet.decrypts} decrypts)')
+
+
+if __name__ == '__main__':
+    bench(with_secret=False)
+    bench(with_secret=True)
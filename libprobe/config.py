@@ -15,30 +15,50 @@ exampleProbe:
 """
 
 
-def encrypt(layer, fernet):
-    for k, v in layer.items():
-        if k in ('secret', 'password') and isinstance(v, str):
-            layer[k] = {"encrypted": fernet.encrypt(str.encode(v))}
-        elif isinstance(v, (list, tuple)):
-            for item in v:
-                if isinstance(item, dict):
-                    encrypt(item, fernet)
-        elif isinstance(v, dict):
-            encrypt(v, fernet)
-
-
-def decrypt(layer, fernet):
-    for k, v in layer.items():
-        if k in ('secret', 'password') and isinstance(v, dict):
+SECRET_KEYS = ('secret', 'password')
+
+
+def secret_leaves(layer: dict) -> list:
+    """Returns a (layer, key) tuple for each `password` and `secret` value.
+
+    The configuration is walked iteratively so deeply nested configurations
+    and configurations with many assets do not hit the recursion limit.
+    """
+    leaves = []
+    stack = [layer]
+    while stack:
+        layer = stack.pop()
+        for k, v in layer.items():
+            if k in SECRET_KEYS and (
+                    isinstance(v, str) or
+                    isinstance(v, dict) and 'encrypted' in v):
+                leaves.append((layer, k))
+            elif isinstance(v, (list, tuple)):
+                stack.extend(item for item in v if isinstance(item, dict))
+            elif isinstance(v, dict):
+                stack.append(v)
+    return leaves
+
+
+def encrypt(layer: dict, fernet) -> int:
+    """Encrypt all plain text secrets; returns the number of encrypted
+    values so the caller knows if the configuration has been changed."""
+    n = 0
+    for parent, k in secret_leaves(layer):
+        v = parent[k]
+        if isinstance(v, str):
+            parent[k] = {"encrypted": fernet.encrypt(str.encode(v))}
+            n += 1
+    return n
+
+
+def decrypt(layer: dict, fernet):
+    for parent, k in secret_leaves(layer):
+        v = parent[k]
+        if isinstance(v, dict):
             ecrypted = v.get("encrypted")
             if ecrypted and isinstance(ecrypted, bytes):
-                layer[k] = fernet.decrypt(ecrypted).decode()
-        elif isinstance(v, (list, tuple)):
-            for item in v:
-                if isinstance(item, dict):
-                    decrypt(item, fernet)
-        elif isinstance(v, dict):
-            decrypt(v, fernet)
+                parent[k] = fernet.decrypt(ecrypted).decode()
 
 
 def get_config(conf: dict, probe_name: str, asset_id):
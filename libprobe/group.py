@@ -0,0 +1,122 @@
+import asyncio
+from typing import Callable, Dict, Set, Tuple
+from .asset import Asset
+from .exceptions import CheckException
+from .profiler import Profiler
+
+
+# Time in seconds to wait for all members of a group to join a run
+GATHER_TIMEOUT = 0.5
+
+
+class _Run:
+
+    __slots__ = ('configs', 'future', 'task', 'handle', 'waiters')
+
+    def __init__(self):
+        self.configs = {}
+        self.future = asyncio.get_event_loop().create_future()
+        self.task = None
+        self.handle = None
+        self.waiters = 0
+
+    def on_done(self, task: asyncio.Task):
+        if self.future.done():
+            return
+        if task.cancelled():
+            self.future.cancel()
+        elif task.exception() is not None:
+            self.future.set_exception(task.exception())
+        else:
+            self.future.set_result(task.result())
+
+
+class CheckGroup:
+    """CheckGroup can be used when multiple checks for a single asset may be
+    build using one session to the asset.
+
+    The group function is called once for all member checks which run at the
+    same interval for an asset, with a dictionary holding the check config
+    for each check name. The function must return a dictionary with the
+    result for each check name. A value may also be an exception instance,
+    for example a CheckException, which is then handled for that check only.
+
+    Checks become a member of the group by using the group instead of a check
+    function, for example:
+
+        group = CheckGroup('myGroup', my_group_fun)
+        checks = {
+            'cpu': group,
+            'memory': group,
+        }
+    """
+    def __init__(self, name: str, fun: Callable):
+        self.name = name
+        self._fun = fun
+        self._runs: Dict[Tuple[int, int, float], _Run] = {}
+
+    async def run(
+            self,
+            asset: Asset,
+            asset_config: dict,
+            config: dict,
+            interval: int,
+            ts: float,
+            members: Set[str],
+            profiler: Profiler) -> dict:
+        key = (asset.id, interval, ts)
+        run = self._runs.get(key)
+        if run is None:
+            run = self._runs[key] = _Run()
+            run.handle = asyncio.get_event_loop().call_later(
+                GATHER_TIMEOUT,
+                self._start, key, asset, asset_config, profiler)
+
+        run.configs[asset.check] = config
+        if members.issubset(run.configs):
+            # all members have joined, no need to wait any longer
+            run.handle.cancel()
+            self._start(key, asset, asset_config, profiler)
+
+        run.waiters += 1
+        try:
+            # shield the future as other members might still be waiting
+            res = await asyncio.shield(run.future)
+        finally:
+            run.waiters -= 1
+            if run.waiters == 0 and not run.future.done():
+                # nobody is waiting for the result anymore
+                run.handle.cancel()
+                if self._runs.get(key) is run:
+                    del self._runs[key]
+                if run.task is not None:
+                    run.task.cancel()
+
+        if not isinstance(res, dict):
+            raise TypeError(
+                'expecting type `dict` as group result '
+                f'but got type `{type(res).__name__}`')
+        try:
+            res = res[asset.check]
+        except KeyError:
+            raise CheckException(f'missing result in group `{self.name}`')
+        if isinstance(res, Exception):
+            raise res
+        return res
+
+    def _start(
+            self,
+            key: tuple,
+            asset: Asset,
+            asset_config: dict,
+            profiler: Profiler):
+        run = self._runs.pop(key, None)
+        if run is None:
+            return
+        group_asset = Asset(asset.id, asset.name, self.name)
+        coro = self._fun(group_asset, asset_config, run.configs)
+        if profiler.enabled:
+            # profile the group function, statistics use the group name
+            coro = profiler.run(group_asset, coro)
+        run.task = asyncio.ensure_future(coro)
+        run.task.add_done_callback(run.on_done)
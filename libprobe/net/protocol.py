@@ -33,6 +33,15 @@ class Protocol(asyncio.Protocol):
         self._package = None
         self._buffered_data.clear()
 
+        # fail pending requests; there will be no response anymore
+        for future, task in self._requests.values():
+            if task is not None:
+                task.cancel()
+            if not future.done():
+                future.set_exception(ConnectionError(
+                    'connection lost while waiting for a response'))
+        self._requests.clear()
+
     def is_connected(self) -> bool:
         return self.transport is not None
 
@@ -2,6 +2,7 @@ import asyncio
 import logging
 import os
 import random
+import signal
 import time
 import yaml
 from cryptography.fernet import Fernet
@@ -18,17 +19,30 @@ from .logger import setup_logger
 from .net.package import Package
 from .protocol import AgentcoreProtocol
 from .asset import Asset
+from .group import CheckGroup
 from .severity import Severity
 from .config import encrypt, decrypt, get_config
+from .secret_cache import SecretCache
+from .profiler import Profiler
 
 
 AGENTCORE_HOST = os.getenv('AGENTCORE_HOST', '127.0.0.1')
 AGENTCORE_PORT = int(os.getenv('AGENTCORE_PORT', 8750))
+AGENTCORE_TIMEOUT = int(os.getenv('AGENTCORE_TIMEOUT', 300))
 OVERSIGHT_CONF_FN = os.getenv('OVERSIGHT_CONF', '/data/config/oversight.yaml')
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', 0))
+PROFILE_SLOW_CHECK = float(os.getenv('PROFILE_SLOW_CHECK', 0))
+PROFILE_FN = os.getenv('PROFILE_FN', '/tmp/libprobe-profile.txt')
 
 # Index in names
 ASSET_NAME_IDX, CHECK_NAME_IDX = range(2)
 
+# Interval in seconds for checking the health of the agentcore connection
+HEALTH_CHECK_INTERVAL = 5
+
+# Maximum time in seconds between reconnect attempts
+MAX_RETRY_STEP = 2 ** 6
+
 # This is the Oversight encryption key used for local configuration files.
 # Note that this is not intended as a real security measure but prevents users
 # from reading a passwords directly from open configuration files.
@@ -50,16 +64,18 @@ class Probe:
 
         self.name = name
         self.version = version
+        self.profiler = Profiler(PROFILE_SAMPLE_RATE, PROFILE_SLOW_CHECK)
         self._checks_funs = checks
         self._config_path = Path(config_path)
         self._connecting = False
         self._protocol = None
-        self._retry_next = 0
-        self._retry_step = 1
+        self._retry_step = 0
         self._local_config = None
         self._local_config_mtime = None
+        self._secrets = SecretCache(FERNET)
         self._checks_config = {}
         self._checks = {}
+        self._group_members = {}
 
         if not os.path.exists(config_path):
             logging.error(f"config file not found: {config_path}")
@@ -77,25 +93,82 @@ class Probe:
         return self._connecting
 
     async def start(self):
-        initial_step = 2
-        step = 2
-        max_step = 2 ** 7
+        self._add_dump_profile_handler()
+
+        self._reconnect()
 
         while True:
-            if not self.is_connected() and not self.is_connecting():
-                asyncio.ensure_future(self._connect())
-                step = min(step * 2, max_step)
-            else:
-                step = initial_step
-            await asyncio.sleep(step)
+            await asyncio.sleep(HEALTH_CHECK_INTERVAL)
+            if self.is_connected():
+                if not self._protocol.is_alive(AGENTCORE_TIMEOUT):
+                    logging.error(
+                        'no heartbeat from agentcore within '
+                        f'{AGENTCORE_TIMEOUT} seconds; close connection')
+                    # abort triggers `connection_lost` and thus a reconnect;
+                    # (close would wait for the write buffer to be flushed)
+                    self._protocol.transport.abort()
+                elif self._protocol.has_heartbeat():
+                    # the connection is healthy, reset the reconnect backoff
+                    self._retry_step = 0
+            elif not self.is_connecting():
+                self._reconnect()
+
+    def _add_dump_profile_handler(self):
+        # SIGUSR1 is not available on all platforms and signal handlers can
+        # only be added when the loop runs in the main thread
+        if hasattr(signal, 'SIGUSR1'):
+            try:
+                asyncio.get_event_loop().add_signal_handler(
+                    signal.SIGUSR1, self._dump_profile)
+                return
+            except (NotImplementedError, RuntimeError):
+                pass
+        logging.debug('dump profile on demand (SIGUSR1) is not available')
+
+    def _dump_profile(self):
+        try:
+            self.profiler.dump(PROFILE_FN)
+        except Exception as e:
+            logging.error(f'failed to write profile: {e}')
+        else:
+            logging.info(f'profile written to: {PROFILE_FN}')
+
+    def _reconnect(self):
+        if self._connecting:
+            return
+        self._connecting = True
+        asyncio.ensure_future(self._connect_loop())
+
+    def _on_connection_lost(self, protocol: AgentcoreProtocol):
+        if protocol is not self._protocol:
+            return
+        logging.warning('connection to agentcore lost; reconnecting')
+        self._reconnect()
+
+    async def _connect_loop(self):
+        try:
+            while True:
+                step = self._retry_step
+                self._retry_step = min(step * 2 or 1, MAX_RETRY_STEP)
+                # jitter prevents probes from reconnecting all at once, for
+                # example when the agentcore restarts
+                await asyncio.sleep(
+                    step * (0.5 + random.random() / 2) if step
+                    else random.random())
+                await self._connect()
+                if self.is_connected():
+                    break
+        finally:
+            self._connecting = False
 
     async def _connect(self):
         conn = asyncio.get_event_loop().create_connection(
-            lambda: AgentcoreProtocol(self._on_assets),
+            lambda: AgentcoreProtocol(
+                self._on_assets,
+                self._on_connection_lost),
             host=AGENTCORE_HOST,
             port=AGENTCORE_PORT
         )
-        self._connecting = True
 
         try:
             _, self._protocol = await asyncio.wait_for(conn, timeout=10)
@@ -112,8 +185,6 @@ class Probe:
                     await self._protocol.request(pkg, timeout=10)
                 except Exception as e:
                     logging.error(e)
-        finally:
-            self._connecting = False
 
     def send(self, path: tuple, rows: dict, ts: float):
         _, asset_id, _ = path
@@ -139,20 +210,23 @@ class Probe:
             config = yaml.safe_load(file)
 
         if config:
-            # First encrypt everything
-            encrypt(config, FERNET)
-
-            # Re-write the file
-            with open(self._config_path, 'w') as file:
-                file.write("""
+            # First encrypt all plain text secrets; the file is only
+            # re-written when at least one secret has been encrypted
+            if encrypt(config, self._secrets):
+                with open(self._config_path, 'w') as file:
+                    file.write("""
 # WARNING: Oversight will make `password` and `secret` values unreadable but
 # this must not be regarded as true encryption as the encryption key is
 # publically available.
 """.lstrip())
-                file.write(yaml.dump(config))
+                    file.write(yaml.dump(config))
+
+            # Now decrypt everything so we can use the configuration; only
+            # secrets which are not in the cache require decryption
+            decrypt(config, self._secrets)
 
-            # Now decrypt everything so we can use the configuration
-            decrypt(config, FERNET)
+            # Drop cached secrets which are no longer in the configuration
+            self._secrets.sweep()
         else:
             config = {}
 
@@ -194,6 +268,18 @@ class Probe:
                 self._run_check_loop(path)
             )
 
+        # group members by asset and interval; checks which are no longer
+        # running, for example after an IgnoreCheckException, are excluded
+        group_members = {}
+        for path, (names, config) in new_checks_config.items():
+            _, asset_id, _ = path
+            check_name = names[CHECK_NAME_IDX]
+            fun = self._checks_funs[check_name]
+            if isinstance(fun, CheckGroup) and not self._checks[path].done():
+                key = (fun, asset_id, config.get('_interval'))
+                group_members.setdefault(key, set()).add(check_name)
+        self._group_members = group_members
+
     async def _run_check_loop(self, path: tuple):
         _, asset_id, _ = path
         (asset_name, check_name), config = self._checks_config[path]
@@ -206,7 +292,15 @@ class Probe:
         assert isinstance(interval, int) and interval > 0
 
         ts = time.time()
-        ts_next = int(ts + random.random() * interval) + 1
+        if isinstance(fun, CheckGroup):
+            # align the phase of all group members for this asset so they
+            # can share a single run of the group function
+            offset = random.Random(f'{fun.name}/{asset_id}').random()
+            ts_next = int(ts - ts % interval + offset * interval) + 1
+            if ts_next <= ts:
+                ts_next += interval
+        else:
+            ts_next = int(ts + random.random() * interval) + 1
 
         while True:
             assert ts < ts_next
@@ -224,10 +318,19 @@ class Probe:
 
             logging.debug(f'run check; {asset}')
 
+            if isinstance(fun, CheckGroup):
+                members = self._group_members[(fun, asset.id, interval)]
+                coro = fun.run(
+                    asset, asset_config, config, interval, ts_next, members,
+                    self.profiler)
+            else:
+                coro = fun(asset, asset_config, config)
+                if self.profiler.enabled:
+                    coro = self.profiler.run(asset, coro)
+
             try:
                 try:
-                    res = await asyncio.wait_for(
-                        fun(asset, asset_config, config), timeout=timeout)
+                    res = await asyncio.wait_for(coro, timeout=timeout)
                     if not isinstance(res, dict):
                         raise TypeError(
                             'expecting type `dict` as check result '
@@ -256,6 +359,10 @@ class Probe:
                 # log as warning; the user is able to prevent this warning by
                 # disabling the check if not relevant for the asset;
                 logging.warning(f'ignore check; {asset}')
+                if isinstance(fun, CheckGroup):
+                    # other members should no longer wait for this check
+                    self._group_members[(fun, asset.id, interval)].discard(
+                        check_name)
                 break
 
             except IncompleteResultException as e:
@@ -0,0 +1,146 @@
+import asyncio
+import cProfile
+import logging
+import pstats
+import random
+import time
+import traceback
+import types
+from collections import deque
+from typing import Coroutine, Dict, Optional
+from .asset import Asset
+
+
+# Maximum number of slow check runs to keep
+MAX_SLOW_CHECKS = 100
+
+# Number of functions to include in the dump for each check
+DUMP_LIMIT = 40
+
+
+class Profiler:
+    """Profiler for check runs.
+
+    A fraction of the check runs, based on the sample rate, is profiled using
+    cProfile and the statistics are aggregated by check name. The sample rate
+    may be overwritten for specific check names using `check_rates`; for a
+    CheckGroup the group name is used as check name. Check runs which take
+    longer than the slow threshold (in seconds) are captured together with
+    the asset and the stack at the moment the threshold was exceeded. Both
+    are written to a file using `dump()`.
+    """
+    def __init__(self, sample_rate: float = 0.0, slow_threshold: float = 0.0):
+        self._stats = {}
+        self._slow = deque(maxlen=MAX_SLOW_CHECKS)
+        self.enable(sample_rate, slow_threshold)
+
+    def enable(
+            self,
+            sample_rate: float = 1.0,
+            slow_threshold: float = 0.0,
+            check_rates: Optional[Dict[str, float]] = None):
+        check_rates = check_rates or {}
+        assert all(
+            0.0 <= rate <= 1.0
+            for rate in (sample_rate, *check_rates.values())), \
+            'sample rates must be in [0, 1]'
+        assert slow_threshold >= 0.0, 'slow_threshold must not be negative'
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self.check_rates = check_rates
+        self.enabled = slow_threshold > 0.0 or \
+            any(rate > 0.0 for rate in (sample_rate, *check_rates.values()))
+
+    def disable(self):
+        self.enable(0.0, 0.0)
+
+    def clear(self):
+        self._stats.clear()
+        self._slow.clear()
+
+    async def run(self, asset: Asset, coro: Coroutine):
+        sample_rate = self.check_rates.get(asset.check, self.sample_rate)
+        profile = cProfile.Profile() \
+            if random.random() < sample_rate else None
+
+        slow_threshold = self.slow_threshold
+        stack = []
+        handle = asyncio.get_event_loop().call_later(
+            slow_threshold, _capture_stack, coro, stack) \
+            if slow_threshold else None
+
+        start = time.perf_counter()
+        try:
+            if profile is None:
+                return await coro
+            return await _profiled(coro, profile)
+        finally:
+            duration = time.perf_counter() - start
+            if profile is not None:
+                self._add_stats(asset.check, profile)
+            if handle is not None:
+                handle.cancel()
+                if duration > slow_threshold:
+                    logging.warning(
+                        f'slow check; {asset} duration: {duration:.3f}s')
+                    self._slow.append((time.time(), asset, duration, stack))
+
+    def dump(self, fn: str):
+        with open(fn, 'w') as file:
+            for check_name, stats in sorted(self._stats.items()):
+                file.write(f'# check: {check_name}\n')
+                stats.stream = file
+                stats.sort_stats('cumulative').print_stats(DUMP_LIMIT)
+
+            for ts, asset, duration, stack in self._slow:
+                file.write(
+                    f'# slow check; {asset} '
+                    f'started: {time.ctime(ts - duration)} '
+                    f'duration: {duration:.3f}s\n')
+                file.write(''.join(stack) or 'no stack captured; the check '
+                           'has probably blocked the event loop\n')
+                file.write('\n')
+
+    def _add_stats(self, check_name: str, profile: cProfile.Profile):
+        stats = self._stats.get(check_name)
+        if stats is None:
+            stats = self._stats[check_name] = pstats.Stats()
+        stats.add(profile)
+
+
+def _capture_stack(coro: Coroutine, stack: list):
+    frames = []
+    while coro is not None:
+        frame = getattr(coro, 'cr_frame', None) or \
+            getattr(coro, 'gi_frame', None)
+        if frame is None:
+            break
+        frames.append((frame, frame.f_lineno))
+        coro = getattr(coro, 'cr_await', None) or \
+            getattr(coro, 'gi_yieldfrom', None)
+    stack.extend(traceback.StackSummary.extract(frames).format())
+
+
+@types.coroutine
+def _profiled(coro: Coroutine, profile: cProfile.Profile):
+    # Only profile while the coroutine itself is running, not the other
+    # tasks which run on the event loop while the coroutine is suspended.
+    send, value = coro.send, None
+    while True:
+        profile.enable()
+        try:
+            future = send(value)
+        except StopIteration as e:
+            return e.value
+        finally:
+            profile.disable()
+
+        try:
+            value = yield future
+        except GeneratorExit:
+            coro.close()
+            raise
+        except BaseException as e:
+            send, value = coro.throw, e
+        else:
+            send = coro.send
@@ -1,10 +1,19 @@
+import asyncio
 import logging
+import socket
 import time
-from typing import Callable
+from typing import Callable, Optional
 from .net.package import Package
 from .net.protocol import Protocol
 
 
+# TCP keepalive; probe idle connections after 60 seconds and give up after
+# three unanswered probes with an interval of 10 seconds.
+KEEPALIVE_IDLE = 60
+KEEPALIVE_INTERVAL = 10
+KEEPALIVE_COUNT = 3
+
+
 class AgentcoreProtocol(Protocol):
 
     PROTO_FAF_DUMP = 0x00
@@ -19,9 +28,40 @@ class AgentcoreProtocol(Protocol):
 
     PROTO_RES_INFO = 0x82
 
-    def __init__(self, _on_assets: Callable):
+    def __init__(self, _on_assets: Callable, _on_connection_lost: Callable):
         super().__init__()
         self._on_assets = _on_assets
+        self._on_connection_lost = _on_connection_lost
+        self._last_info = None
+        self._has_heartbeat = False
+
+    def connection_made(self, transport: asyncio.BaseTransport):
+        '''
+        override asyncio.Protocol
+        '''
+        super().connection_made(transport)
+        self._last_info = time.monotonic()
+
+        sock = transport.get_extra_info('socket')
+        if sock is not None:
+            set_keepalive(sock)
+
+    def connection_lost(self, exc: Optional[Exception]):
+        '''
+        override asyncio.Protocol
+        '''
+        super().connection_lost(exc)
+        self._on_connection_lost(self)
+
+    def is_alive(self, timeout: float) -> bool:
+        """Returns False when no heartbeat (PROTO_REQ_INFO) is received from
+        the agentcore within the given timeout in seconds."""
+        return self.is_connected() and \
+            time.monotonic() - self._last_info < timeout
+
+    def has_heartbeat(self) -> bool:
+        """Returns True when at least one heartbeat has been received."""
+        return self._has_heartbeat
 
     def _on_res_announce(self, pkg: Package):
         logging.debug(f"on announce; data size: {len(pkg.data)}")
@@ -38,6 +78,8 @@ class AgentcoreProtocol(Protocol):
 
     def _on_req_info(self, pkg: Package):
         logging.debug(f"on heartbeat; data size: {len(pkg.data)}")
+        self._last_info = time.monotonic()
+        self._has_heartbeat = True
 
         resp_pkg = Package.make(
             AgentcoreProtocol.PROTO_RES_INFO,
@@ -56,3 +98,18 @@ class AgentcoreProtocol(Protocol):
             logging.error(f'unhandled package type: {pkg.tp}')
         else:
             handle(self, pkg)
+
+
+def set_keepalive(sock: socket.socket):
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+
+    # the options below are not available on all platforms
+    if hasattr(socket, 'TCP_KEEPIDLE'):
+        sock.setsockopt(
+            socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, KEEPALIVE_IDLE)
+    if hasattr(socket, 'TCP_KEEPINTVL'):
+        sock.setsockopt(
+            socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, KEEPALIVE_INTERVAL)
+    if hasattr(socket, 'TCP_KEEPCNT'):
+        sock.setsockopt(
+            socket.IPPROTO_TCP, socket.TCP_KEEPCNT, KEEPALIVE_COUNT)
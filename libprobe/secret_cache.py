@@ -0,0 +1,48 @@
+from cryptography.fernet import Fernet
+
+
+class SecretCache:
+    """SecretCache wraps a Fernet instance and caches the plain text for each
+    encrypted token.
+
+    The cache can be used as a replacement for Fernet when calling `encrypt`
+    and `decrypt` from the config module. On a configuration reload only the
+    secrets which are new or changed are decrypted using Fernet; secrets
+    which are encrypted during the reload are added to the cache right away.
+
+    Call `sweep()` after each reload; tokens which are not used since the
+    previous sweep are removed. The cache therefore holds all the secrets of
+    the current configuration, regardless of the size. The `maxsize` is only
+    a safety limit; once reached, new tokens are no longer cached.
+    """
+    def __init__(self, fernet: Fernet, maxsize: int = 2 ** 20):
+        assert maxsize > 0, 'maxsize must be a positive integer'
+        self._fernet = fernet
+        self._maxsize = maxsize
+        self._cache = {}  # tokens used before the last sweep
+        self._seen = {}  # tokens used since the last sweep
+
+    def __len__(self) -> int:
+        return len(self._cache) + len(self._seen)
+
+    def encrypt(self, data: bytes) -> bytes:
+        token = self._fernet.encrypt(data)
+        self._set(token, data)
+        return token
+
+    def decrypt(self, token: bytes) -> bytes:
+        data = self._seen.get(token)
+        if data is None:
+            data = self._cache.pop(token, None)
+            if data is None:
+                data = self._fernet.decrypt(token)
+            self._set(token, data)
+        return data
+
+    def sweep(self):
+        self._cache = self._seen
+        self._seen = {}
+
+    def _set(self, token: bytes, data: bytes):
+        if len(self) < self._maxsize:
+            self._seen[token] = data